@@ -7,67 +7,185 @@
 #
 
 import logging
-from datetime import datetime
-import dateutil.parser
-from dateutil.parser import ParserError
+import threading
+from functools import lru_cache
+from datetime import date, datetime
 from typing import ByteString, AnyStr, Any
 from lxml import etree
 from PIL import Image
+from PIL.ExifTags import TAGS
+
+logger = logging.getLogger(__name__)
 
 # ========================
 # === Helper Functions ===
 # ========================
 
+# Exif DateTime, DateTimeOriginal and DateTimeDigitized are always written in this format
+EXIF_DATETIME_FORMAT = '%Y:%m:%d %H:%M:%S'
+
+# XMP never uses xml:id or entities, and must not reach out to the network.
+# Indentation between elements is dropped so it does not stay in memory as text nodes.
+XMP_PARSER_OPTIONS = dict(recover=True, collect_ids=False, resolve_entities=False, no_network=True, huge_tree=False,
+                          remove_blank_text=True)
+
+# English day and month names for locale-independent date formatting
+WEEKDAYS = ('Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday')
+MONTHS = (None, 'January', 'February', 'March', 'April', 'May', 'June',
+          'July', 'August', 'September', 'October', 'November', 'December')
+
+# Exif text values repeated across a photo library, shared as one string object each, see share_string()
+SHARED_EXIF_TAGS = frozenset(('Make', 'Model', 'Software'))
+
+# Upper bound on the distinct strings kept by share_string(), values come from untrusted input
+STRING_POOL_SIZE = 4096
+
+_parser_local = threading.local()  # One XMP parser per thread, see get_xmp_parser()
+_string_pool: dict[str, str] = {}
+
+
+def share_string(_value: str) -> str:
+    """
+    Returns one shared string object per value for low-cardinality metadata such as camera make and model.
+
+    Unlike sys.intern, the pool is bounded: once STRING_POOL_SIZE values are kept, new values are returned as-is.
+
+    :param _value: String value
+    :return: The pooled string equal to the value, or the value itself
+    """
+
+    if (shared := _string_pool.get(_value)) is not None:
+        return shared
+    if len(_string_pool) < STRING_POOL_SIZE:
+        return _string_pool.setdefault(_value, _value)
+
+    return _value
+
+
+def get_xmp_parser() -> etree.XMLParser:
+    """
+    Returns the XMP parser of the current thread, created once per thread with XMP_PARSER_OPTIONS.
+
+    lxml parsers can be reused for many documents but not by several threads at the same time.
 
-def parse_xml(_xmp_xml: ByteString) -> etree._ElementTree:
+    :return: lxml XML parser
+    """
+
+    if (parser := getattr(_parser_local, 'parser', None)) is None:
+        parser = _parser_local.parser = etree.XMLParser(**XMP_PARSER_OPTIONS)
+
+    return parser
+
+
+def parse_xml(_xmp_xml: ByteString | str) -> etree._ElementTree:
     """
     Parses the raw XMP packet XML and returns it as an ElementTree using lxml.
 
+    The packet is parsed in one call with the thread's reusable parser, see get_xmp_parser().
+
+    Bytes are handed to lxml as-is, which detects the encoding itself. Only text packets
+    (e.g. from PNG iTXt chunks) are encoded first.
+
     :param _xmp_xml: Raw XMP pack as a byte string
     :return: XMP metadata as an XML ElementTree
     """
 
+    if isinstance(_xmp_xml, str):
+        _xmp_xml = _xmp_xml.encode()
+
     try:
-        _xmp_xml = etree.ElementTree(etree.fromstring(_xmp_xml.decode()))
+        root = etree.fromstring(_xmp_xml, get_xmp_parser())
+        if root is None:  # Nothing could be recovered
+            return etree.ElementTree()
+        _xmp_xml = root.getroottree()
 
     except etree.XMLSyntaxError as xse:
-        logging.error(f'Type Error: {xse}')
+        logger.error('Type Error: %s', xse)
 
     return _xmp_xml
 
 
-def cast_datatype(_value: Any, _data_type: Any) -> AnyStr | datetime | int | float | bool:
+@lru_cache(maxsize=4096)
+def parse_datetime(_value: str) -> datetime | None:
     """
+    Parses an Exif or XMP date string into a datetime.
+
+    XMP dates are ISO 8601 and parsed with datetime.fromisoformat. Exif dates ('YYYY:MM:DD HH:MM:SS')
+    only differ by the date separator, so it is swapped to '-' and they are parsed with fromisoformat too,
+    with strptime as a fallback for unpadded values. Anything else is left to dateutil's fuzzy parser.
+    Images from the same shoot repeat the same date strings, so results are memoized per string.
+    Failures are memoized too, e.g. the '0000:00:00 00:00:00' written by cameras without a clock set.
 
-    :return:
+    :param _value: Date string
+    :return: Parsed datetime, or None if the string could not be parsed
     """
 
-    if _data_type is datetime:
+    if _value[4:5] == ':':  # Exif date
         try:
-            _value = str(_value).replace(":", "")
-            _value = dateutil.parser.parse(timestr=_value, default=None, fuzzy=True)
-        except ParserError as pe:
-            logging.error(f'Error parsing date string to datetime: {pe}')
-        except OverflowError as oe:
-            logging.error(f'Overflow error when parsing date string to datetime: {oe}')
-
-    elif _data_type is int:
+            return datetime.fromisoformat(_value.replace(':', '-', 2))
+        except ValueError:
+            pass
         try:
-            _value = int(float(_value))
-        except Exception as exc:
-            logging.error(f'Error converting value to integer: {exc}')
-
-    elif _data_type is float:
+            return datetime.strptime(_value, EXIF_DATETIME_FORMAT)
+        except ValueError:
+            pass
+    else:
         try:
-            _value = float(_value)
-        except Exception as exc:
-            logging.error(f'Error converting value to float: {exc}')
+            return datetime.fromisoformat(_value)
+        except ValueError:
+            pass
+
+    # dateutil is slow to import and only needed for unusual date strings
+    from dateutil.parser import parse, ParserError
+
+    try:
+        return parse(timestr=_value.replace(":", ""), default=None, fuzzy=True)
+    except ParserError as pe:
+        logger.error('Error parsing date string to datetime: %s', pe)
+    except OverflowError as oe:
+        logger.error('Overflow error when parsing date string to datetime: %s', oe)
+
+    return None
+
+
+def parse_bool(_value: Any) -> bool:
+    """
+    Parses an XMP Boolean, which is written as the string 'True' or 'False'.
+
+    :param _value: Boolean string, or any other value to test for truth
+    :return: Parsed boolean
+    """
+
+    if isinstance(_value, str):
+        return _value.strip().lower() == 'true'
+
+    return bool(_value)
+
+
+# Converter for each data type that values are cast to, see cast_datatype()
+CASTERS = {
+    datetime: lambda _value: parse_datetime(str(_value)),
+    int: lambda _value: int(float(_value)),
+    float: float,
+    bool: parse_bool
+}
 
-    elif _data_type is bool:
+
+def cast_datatype(_value: Any, _data_type: Any) -> AnyStr | datetime | int | float | bool:
+    """
+    Casts a metadata value to the data type of its schema attribute, see CASTERS.
+
+    :param _value: Value read from XMP or Exif
+    :param _data_type: Data type to cast to
+    :return: Value of type _data_type
+    """
+
+    if (caster := CASTERS.get(_data_type)) is not None:
         try:
-            _value = bool(_value)
+            if (result := caster(_value)) is not None:
+                _value = result
         except Exception as exc:
-            logging.error(f'Error converting value to bool: {exc}')
+            logger.error('Error converting value to %s: %s', _data_type.__name__, exc)
 
     assert type(_value) is _data_type
 
@@ -83,17 +201,37 @@ def build_exif_dictionary(_exif: Image.Exif, _exif_object: object):
     :return: Exif schema object containing Image Exif data
     """
 
+    annotations = _exif_object.__annotations__
     for tag, value in _exif.items():
-        exif_tag = Image.ExifTags.TAGS[tag]
-        if hasattr(_exif_object, exif_tag):
-            if not isinstance(value, data_type := _exif_object.__annotations__[exif_tag]):
+        exif_tag = TAGS.get(tag, tag)  # Vendor-specific tags have no name
+        if (data_type := annotations.get(exif_tag)) is not None:
+            if not isinstance(value, data_type):
                 try:
                     value = cast_datatype(_value=value, _data_type=data_type)
                 except TypeError as te:
-                    logging.error(f'Type Error: {te}')
+                    logger.error('Type Error: %s', te)
                 except AssertionError as ae:
-                    logging.error(f'Assertion Error: {ae}')
+                    logger.error('Assertion Error: %s', ae)
+            if exif_tag in SHARED_EXIF_TAGS and type(value) is str:
+                value = share_string(value)
 
             _exif_object.__setattr__(exif_tag, value)
 
     return _exif_object
+
+
+@lru_cache(maxsize=1024)
+def format_capture_date(_date: date) -> str:
+    """
+    Formats a capture date as 'Weekday, Month DD, YYYY', memoized per calendar date.
+
+    Pass datetime.date() rather than the datetime itself: aware datetimes of the same instant
+    in different offsets hash equal but fall on different local dates.
+
+    Same output as strftime('%A, %B %d, %Y') in the C locale, without going through the locale machinery.
+
+    :param _date: Capture date
+    :return: Formatted date string
+    """
+
+    return f'{WEEKDAYS[_date.weekday()]}, {MONTHS[_date.month]} {_date.day:02d}, {_date.year}'
@@ -7,22 +7,35 @@
 #
 
 import logging
+import os
+import threading
 from dataclasses import dataclass, InitVar, field
-from typing import AnyStr
+from typing import AnyStr, Any, Iterable
+from concurrent.futures import ThreadPoolExecutor
 from lxml import etree
-from collections import deque
 from PIL import Image
 from datetime import datetime
 from pathlib import Path
 from .schemas import Schemas, Exif
-from .helpers import parse_xml, build_exif_dictionary
+from .helpers import parse_xml, build_exif_dictionary, format_capture_date
+
+logger = logging.getLogger(__name__)
+
+_load_lock = threading.Lock()  # Publishes the results of Metadata._load() once, see there
+
+# Properties searched for the capture date, in order of priority (XMP then EXIF)
+CAPTURE_DATE_KEYS = (('xmp', 'CreateDate'), ('exif', 'DateTime'), ('exif', 'DateTimeOriginal'),
+                     ('photoshop', 'DateCreated'))
+
+# Properties that make up the location in image_info()
+LOCATION_KEYS = (('Iptc4xmpCore', 'Location'), ('photoshop', 'City'), ('photoshop', 'State'))
 
 # ========================
 # ==== Metadata Class ====
 # ========================
 
 
-@dataclass(frozen=False)
+@dataclass(frozen=False, slots=True)
 class Metadata:
     """
     Extracts and organizes metadata (XMP and EXIF) from a Pillow image
@@ -31,47 +44,157 @@ class Metadata:
 
     Args:
         pil_image (PIL.Image.Image): A Pillow image object containing metadata.
+        exif_only (bool): Skip XMP parsing when only Exif data is needed.
 
     Attributes:
         filename:
         xmp_xml:
         metadata:
 
+    The XMP packet is only parsed, and the Exif data only read into the schemas, when xmp_xml
+    or metadata is first accessed.
+
     """
 
     pil_image: InitVar[Image.Image]
-    filename: AnyStr = field(default_factory=str, init=False)  # Store the filename for later use
-    xmp_xml: etree._ElementTree = field(default_factory=etree._ElementTree, init=False)  # Keep the raw XMP data as XML
+    filename: AnyStr = field(default='', init=False)  # Store the filename for later use
+    xmp_xml: etree._ElementTree = field(default=None, init=False)  # Keep the raw XMP data as XML, set in _load()
     metadata: Schemas = None
+    _birthtime: float | None = field(default=None, init=False, repr=False)  # File creation time, stat'ed once
+    _xmp_packet: bytes | str | None = field(default=None, init=False, repr=False, compare=False)  # Until loaded
+    _exif: Image.Exif | None = field(default=None, init=False, repr=False, compare=False)  # Until loaded
+    exif_only: InitVar[bool] = False
 
-    def __post_init__(self, pil_image: Image.Image) -> None:
+    def __post_init__(self, pil_image: Image.Image, exif_only: bool) -> None:
         """
         Initializes Metadata object with image data.
 
         :param pil_image: (PIL.Image.Image)
+        :param exif_only: (bool) Skip XMP parsing when only Exif data is needed.
         """
 
         if not isinstance(pil_image, Image.Image):
             raise TypeError("pil_image must be a PIL.Image.Image object.")
 
-        if hasattr(pil_image, 'filename'):
-            self.filename = pil_image.filename
-
-        try:
-            self.xmp_xml = parse_xml(pil_image.info['xmp'])
-        except KeyError as ke:
-            logging.error(f"Key Error: {ke}")
-        except TypeError as te:
-            logging.error(f"Type Error: {te}")
-        except etree.XMLSyntaxError as xse:
-            logging.error(f"XML Syntax Error: {xse}")
-        except etree.ParseError as pe:
-            logging.error(f"Parse Error: {pe}")
-        finally:
-            self.metadata = Schemas(xml_tree=self.xmp_xml)
-
-        if exif := pil_image.getexif():
-            self.metadata.exif = build_exif_dictionary(_exif=exif, _exif_object=Exif())
+        self.filename = getattr(pil_image, 'filename', '') or ''
+
+        if self.filename:
+            try:
+                stat = os.stat(self.filename)
+                # st_birthtime is not available on every platform, fall back to the modification time
+                self._birthtime = getattr(stat, 'st_birthtime', stat.st_mtime)
+            except OSError as ose:
+                logger.error("OS Error: %s", ose)
+
+        if not exif_only:
+            try:
+                self._xmp_packet = pil_image.info['xmp']
+            except KeyError as ke:
+                logger.error("Key Error: %s", ke)
+
+        # Read the Exif data now, the image file may be closed by the time it is loaded
+        self._exif = pil_image.getexif()
+
+        # Loaded on first access, see __getattr__
+        del self.xmp_xml, self.metadata
+
+    def __getattr__(self, name: str) -> Any:
+        """
+        Loads xmp_xml and metadata on first access, Python only calls this while their slots are unset.
+
+        :param name: (str) The attribute name.
+        :return: The attribute value.
+        """
+
+        if name in ('xmp_xml', 'metadata'):
+            self._load()
+            return getattr(self, name)
+
+        raise AttributeError(f"'{type(self).__name__}' object has no attribute '{name}'")
+
+    def _load(self) -> None:
+        """
+        Parses the XMP packet and builds the schemas from the XMP and Exif data.
+
+        Everything is built in locals and only published at the end, so other threads never see
+        half-built metadata. If two threads load at the same time, the first result is kept.
+        """
+
+        xmp_packet, exif = self._xmp_packet, self._exif
+        xmp_xml = metadata = None
+
+        if xmp_packet is not None:
+            try:
+                xmp_xml = parse_xml(xmp_packet)
+                metadata = Schemas(xml_tree=xmp_xml)
+            except TypeError as te:
+                logger.error("Type Error: %s", te)
+            except etree.XMLSyntaxError as xse:
+                logger.error("XML Syntax Error: %s", xse)
+            except etree.ParseError as pe:
+                logger.error("Parse Error: %s", pe)
+
+        if metadata is None:
+            xmp_xml = etree.ElementTree()
+            metadata = Schemas.empty()
+
+        if exif:
+            metadata.exif = build_exif_dictionary(_exif=exif, _exif_object=Exif())
+
+        with _load_lock:
+            try:
+                object.__getattribute__(self, 'metadata')  # Bypasses __getattr__, raises while unset
+            except AttributeError:
+                self.xmp_xml, self.metadata = xmp_xml, metadata
+                self._xmp_packet = self._exif = None
+
+    @classmethod
+    def from_path(cls, path: str | Path, exif_only: bool = False) -> 'Metadata':
+        """
+        Opens an image file and extracts its metadata without decoding the pixel data.
+
+        Image.open only reads the file headers and .load() is never called. The file is closed before returning.
+
+        :param path: (str | Path) Path to the image file.
+        :param exif_only: (bool) Skip XMP parsing when only Exif data is needed.
+        :return: (Metadata) The image's metadata.
+        """
+
+        with Image.open(path) as pil_image:
+            return cls(pil_image, exif_only=exif_only)
+
+    @classmethod
+    def from_images(cls, images: Iterable[Image.Image], max_workers: int | None = None) -> list['Metadata']:
+        """
+        Extracts the metadata of many opened images using a thread pool.
+
+        Unlike the constructor, the XMP packet is parsed and the schemas are built right away, inside the
+        worker threads. lxml releases the GIL while parsing, and the results keep their XML trees without
+        having to be pickled between processes. Use extract_many() to process image files across processes instead.
+
+        :param images: (Iterable[PIL.Image.Image]) Pillow image objects containing metadata.
+        :param max_workers: (int | None) Number of threads, defaults to ThreadPoolExecutor's default.
+        :return: (list[Metadata]) The metadata of each image, in the order of images.
+        """
+
+        def load(pil_image: Image.Image) -> 'Metadata':
+            metadata = cls(pil_image)
+            metadata._load()
+            return metadata
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            return list(executor.map(load, images))
+
+    def search_metadata(self, prefix: str, localname: str) -> Any:
+        """
+        Looks up a metadata value by namespace prefix and local name, e.g. ('dc', 'subject').
+
+        :param prefix: (str) The namespace prefix, as named in Schemas.
+        :param localname: (str) The property name.
+        :return: The property value, or None if not found.
+        """
+
+        return self.metadata.lookup(prefix, localname)
 
     def get_capture_date(self) -> datetime | None:
         """
@@ -80,16 +203,13 @@ class Metadata:
         :return: (str) The capture date in 'Weekday, Month DD, YYYY' format, or None if not found.
         """
 
-        # Prioritize XMP then EXIF
-        search = deque([('xmp', 'CreateDate'), ('exif', 'DateTime'), ('exif', 'DateTimeOriginal'), ('photoshop', 'DateCreated')])
-        while search:
-            prefix, localname = search.popleft()
-            if capture_date := self.metadata.__getattribute__(prefix).__getattribute__(localname):
+        lookup = self.metadata.lookup
+        for prefix, localname in CAPTURE_DATE_KEYS:
+            if capture_date := lookup(prefix, localname):
                 return capture_date
 
-        if creation_date := Path(self.filename):  # Fallback to file creation time
-            date = datetime.fromtimestamp(creation_date.stat().st_birthtime)
-            return date
+        if self._birthtime is not None:  # Fallback to file creation time
+            return datetime.fromtimestamp(self._birthtime)
 
         return None
 
@@ -101,7 +221,7 @@ class Metadata:
         """
 
         if capture_date := self.get_capture_date():
-            return capture_date.strftime('%A, %B %d, %Y')
+            return format_capture_date(capture_date.date())
 
     def image_info(self) -> str:
         """
@@ -111,21 +231,53 @@ class Metadata:
         """
 
         info = []
+        lookup = self.metadata.lookup
         # Get the capture date
         if capture_date := self.get_capture_date_string():
             info.append("Date Created: " + capture_date)
         # Get the image description
-        if description := self.metadata.dc.description:
+        if description := lookup('dc', 'description'):
             info.append("Description: " + description)
         # Get keywords
-        if keywords := self.metadata.dc.subject:
+        if keywords := lookup('dc', 'subject'):
             info.append("Keywords: " + ", ".join(keywords))
         # Get location data
-        location = []
-        for prefix, localname in [('Iptc4xmpCore', 'Location'), ('photoshop', 'City'), ('photoshop', 'State')]:
-            if loc := self.metadata.__getattribute__(prefix).__getattribute__(localname):
-                location.append(loc)
-        if location:
+        if location := [loc for loc in (lookup(prefix, localname) for prefix, localname in LOCATION_KEYS) if loc]:
             info.append("Location: " + ", ".join(location))
 
         return "\n".join(info)
+
+
+# ========================
+# === Batch Extraction ===
+# ========================
+
+
+def _extract(path: str | Path) -> dict:
+    """
+    Process pool worker, returns the metadata of one image file as a plain dict.
+
+    :param path: (str | Path) Path to the image file.
+    :return: (dict) The image's metadata, see Schemas.to_dict().
+    """
+
+    return Metadata.from_path(path).metadata.to_dict()
+
+
+def extract_many(paths: Iterable[str | Path], workers: int | None = None) -> list[dict]:
+    """
+    Extracts the metadata of many image files in parallel using a process pool.
+
+    Parsing and building the schemas is CPU-bound and holds the GIL, so files are spread over worker
+    processes. Results are returned as plain dicts (see Schemas.to_dict()) in the order of paths.
+
+    :param paths: (Iterable[str | Path]) Paths to the image files.
+    :param workers: (int | None) Number of worker processes, defaults to the number of CPUs.
+    :return: (list[dict]) The metadata of each image.
+    """
+
+    # multiprocessing is slow to import and only needed here
+    from concurrent.futures import ProcessPoolExecutor
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(_extract, paths, chunksize=32))
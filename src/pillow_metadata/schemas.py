@@ -6,12 +6,21 @@
 # standardized Python dataclass data structure from a Pillow (PIL) source image.
 #
 
+import json
 import logging
-from dataclasses import dataclass, field, InitVar
+import sys
+from dataclasses import dataclass, field, fields, InitVar
 from datetime import datetime
 from lxml import etree
-from typing import Any, Literal
-from .helpers import cast_datatype
+from typing import Any, Literal, get_origin
+from .helpers import cast_datatype, share_string
+
+try:
+    import orjson  # Optional, faster JSON serialization in Schemas.to_json()
+except ImportError:
+    orjson = None
+
+logger = logging.getLogger(__name__)
 
 # =======================
 # ==== Namespace Map ====
@@ -32,6 +41,31 @@ NS_MAP = {
     'xml': '{http://www.w3.org/XML/1998/namespace}'
 }
 
+# Descriptor tags are interned once, tags from the parsed packet are not since they are untrusted input
+RDF_DESCRIPTION = sys.intern(f'{NS_MAP['rdf']}Description')
+
+_MISSING = object()  # Sentinel for lookups that have not been resolved yet
+_EMPTY_TREE = etree.ElementTree()  # Shared by all Schemas of images without XMP, see Schemas.empty()
+
+# Selects the x-default item of an rdf:Alt language alternative
+ALT_DEFAULT = etree.XPath("*[@xml:lang='x-default']")
+
+
+def index_elements(xml: etree._ElementTree) -> dict[str, etree._Element]:
+    """
+    Maps each tag in the XML tree to its first element in document order, in a single pass.
+
+    :param xml: XML ElementTree, parsed by lxml
+    :return: Dictionary of elements by tag
+    """
+
+    elements = {}
+    if xml.getroot() is not None:
+        for ele in xml.iter(etree.Element):
+            elements.setdefault(ele.tag, ele)
+
+    return elements
+
 # ========================
 # === Descriptor Class ===
 # ========================
@@ -43,73 +77,71 @@ class XPath:
 
     """
 
-    def __init__(self, tag: str, xmp_data_type: Literal['text', 'bag', 'alt', 'seq']):
-        self.tag = tag
+    __slots__ = ('tag', 'datatype', 'share_value', 'attrib_name', 'annotation', '_extract')
+
+    def __init__(self, tag: str, xmp_data_type: Literal['text', 'bag', 'alt', 'seq'], share_value: bool = False):
+        self.tag = sys.intern(tag)
         self.datatype = xmp_data_type
+        self.share_value = share_value  # Share one string object per value, see share_string()
+        # Bind the extractor for the data type once, rdf:Seq is read the same way as rdf:Bag
+        self._extract = getattr(self, f"_extract_{'bag' if xmp_data_type == 'seq' else xmp_data_type}")
 
     def __set_name__(self, owner: object, name: str):
         self.attrib_name = name
-        self.annotation = owner.__annotations__.get(name)
-
-    def __get__(self, instance: Any, owner=None) -> str | int | float | list | datetime | None:
-        value = self.lookup(instance._xml_tree)
+        # Resolve the annotation to a runtime type once, e.g. tuple[str, ...] to tuple for isinstance checks
+        annotation = owner.__annotations__.get(name)
+        self.annotation = get_origin(annotation) or annotation
+
+    def __get__(self, instance: Any, owner=None) -> str | int | float | tuple | datetime | None:
+        value = self.lookup(instance._elements)
+        if self.share_value and type(value) is str:
+            value = share_string(value)
         instance.__dict__[self.attrib_name] = value
         return value
 
-    def lookup(self, xml: etree._ElementTree) -> str | int | float | list | datetime | None:
-        value = None
-        if xml is None or xml.getroot() is None:
-            logging.warning("XML tree or root is None.")
+    def _extract_text(self, elements: dict[str, etree._Element]) -> str | None:
+        if (ele := elements.get(self.tag)) is not None:
+            return ele.text.strip()
+        # Simple properties may also be written as attributes of rdf:Description
+        ele = elements.get(RDF_DESCRIPTION)
+        if ele is not None and (attrib := ele.get(self.tag)) is not None:
+            return attrib.strip()
+
+        return None
+
+    def _extract_bag(self, elements: dict[str, etree._Element]) -> tuple | None:
+        if (ele := elements.get(self.tag)) is None:
+            logger.debug("Bag with tag '%s' nof found.", self.tag)
+        elif len(ele) == 1:  # A single rdf:Bag container, read-only since the value is memoized
+            return tuple(li.text.strip() for li in ele[0])
+
+        return None
+
+    def _extract_alt(self, elements: dict[str, etree._Element]) -> str | None:
+        if (ele := elements.get(self.tag)) is None:
+            logger.debug("Alt with tag '%s' not found.", self.tag)
+        elif len(ele) == 1 and (default := ALT_DEFAULT(ele[0])):
+            return default[0].text.strip()
+
+        return None
+
+    def lookup(self, elements: dict[str, etree._Element]) -> str | int | float | tuple | datetime | None:
+        if not elements:
+            logger.warning("XML tree or root is None.")
             return None
 
         try:
-            ele = xml.find(f'.//{self.tag}')
-            if self.datatype == 'text':
-                if ele is not None:
-                    value = ele.text.strip()
-                else:
-                    ele = xml.find(f'.//{NS_MAP['rdf']}Description')
-                    if ele is not None and ele.attrib:
-                        if self.tag in ele.attrib:
-                            value = ele.attrib[self.tag].strip()
-
-            elif self.datatype == 'bag':
-                if ele is not None:
-                    items = []
-                    bag = ele.getchildren()
-                    if len(bag) == 1:
-                        for li in bag[0].iterchildren():
-                            items.append(li.text.strip())
-                        value = items
-                else:
-                    logging.debug(f"Bag with tag '{self.tag}' nof found.")
-
-            elif self.datatype == 'alt':
-                if ele is not None:
-                    alt = ele.getchildren()
-                    if len(alt) == 1:
-                        for li in alt[0].iterchildren():
-                            if NS_MAP['xml'] + 'lang' in li.attrib and li.attrib[NS_MAP['xml'] + 'lang'] == 'x-default':
-                                value = li.text.strip()
-                                break
-                else:
-                    logging.debug(f"Alt with tag '{self.tag}' not found.")
-
+            value = self._extract(elements)
         except Exception as e:
-            logging.error(f"An unexpected error occurred during XML lookup for tag '{self.tag}': {e}")
+            logger.error("An unexpected error occurred during XML lookup for tag '%s': %s", self.tag, e)
             return None
 
         if value and not isinstance(value, self.annotation):
             try:
-                value = cast_datatype(_value=value, _data_type=self.annotation)
-            except TypeError as te:
-                logging.error(f'Type Error: {te}')
-            except AssertionError as ae:
-                logging.error(f'Assertion Error: {ae} {value} {self.annotation}')
-            else:
-                return value
-
-            return None
+                return cast_datatype(_value=value, _data_type=self.annotation)
+            except (TypeError, AssertionError) as e:
+                logger.error('%s casting %s to %s: %s', type(e).__name__, value, self.annotation, e)
+                return None
 
         return value
 
@@ -125,16 +157,37 @@ class Xml:
 
      Attributes:
          _xml_tree: XML ElementTree, parsed by lxml
+         _elements: First element of each tag in the tree, see index_elements()
 
     """
 
     _xml_tree: etree._ElementTree
+    _elements: dict[str, etree._Element] = field(default=None, repr=False, compare=False)
 
     def __post_init__(self):
 
         if not isinstance(self._xml_tree, etree._ElementTree):
             raise TypeError(f'xml_tree expected type ElementTree, got {type(self._xml_tree)} instead.')
 
+        if self._elements is None:
+            self._elements = index_elements(self._xml_tree)
+
+    @classmethod
+    def construct(cls, xml_tree: etree._ElementTree, elements: dict[str, etree._Element]):
+        """
+        Creates an instance from a tree and index that were already validated, skipping __init__ and __post_init__.
+
+        :param xml_tree: (etree._ElementTree) validated XML tree
+        :param elements: (dict) element index built by index_elements()
+        :return: instance of the namespace class
+        """
+
+        instance = cls.__new__(cls)
+        instance._xml_tree = xml_tree
+        instance._elements = elements
+
+        return instance
+
 
 class Xmp(Xml):
     """
@@ -161,8 +214,8 @@ class Xmp(Xml):
 
     # XMP properties
     CreateDate: datetime = XPath(tag=f"{NS_MAP['xmp']}{'CreateDate'}", xmp_data_type='text')
-    CreatorTool: str = XPath(tag=f"{NS_MAP['xmp']}{'CreatorTool'}", xmp_data_type='text')
-    Identifier: list = XPath(tag=f"{NS_MAP['xmp']}{'Identifier'}", xmp_data_type='bag')
+    CreatorTool: str = XPath(tag=f"{NS_MAP['xmp']}{'CreatorTool'}", xmp_data_type='text', share_value=True)
+    Identifier: tuple = XPath(tag=f"{NS_MAP['xmp']}{'Identifier'}", xmp_data_type='bag')
     Label: str = XPath(tag=f"{NS_MAP['xmp']}{'Label'}", xmp_data_type='text')
     MetadataDate: datetime = XPath(tag=f"{NS_MAP['xmp']}{'MetadataDate'}", xmp_data_type='text')
     ModifyDate: datetime = XPath(tag=f"{NS_MAP['xmp']}{'ModifyDate'}", xmp_data_type='text')
@@ -194,7 +247,7 @@ class XmpRights(Xml):
     # XMPRights properties
     Certificate: str = XPath(tag=f"{NS_MAP['xmpRights']}{'Certificate'}", xmp_data_type='text')
     Marked: bool = XPath(tag=f"{NS_MAP['xmpRights']}{'Marked'}", xmp_data_type='text')
-    Owner: list = XPath(tag=f"{NS_MAP['xmpRights']}{'Owner'}", xmp_data_type='bag')
+    Owner: tuple = XPath(tag=f"{NS_MAP['xmpRights']}{'Owner'}", xmp_data_type='bag')
     UsageTerms: str = XPath(tag=f"{NS_MAP['xmpRights']}{'UsageTerms'}", xmp_data_type='text')
     WebStatement: str = XPath(tag=f"{NS_MAP['xmpRights']}{'WebStatement'}", xmp_data_type='text')
 
@@ -222,7 +275,7 @@ class XmpMM(Xml):
     DocumentID: str = XPath(tag=f"{NS_MAP['xmpMM']}{'DocumentID'}", xmp_data_type='text')
     OriginalDocumentID: str = XPath(tag=f"{NS_MAP['xmpMM']}{'OriginalDocumentID'}", xmp_data_type='text')
     InstanceID: str = XPath(tag=f"{NS_MAP['xmpMM']}{'InstanceID'}", xmp_data_type='text')
-    # History: list = XPath(tag=f"{NS_MAP['xmpMM']}{'History'}", xmp_data_type='bag')  # ordered array
+    # History: tuple = XPath(tag=f"{NS_MAP['xmpMM']}{'History'}", xmp_data_type='bag')  # ordered array
 
 
 class Iptc4XmpCore(Xml):
@@ -266,7 +319,7 @@ class Iptc4XmpExt(Xml):
     """
 
     # Iptc4XmpExt properties
-    PersonInImage: list = XPath(tag=f"{NS_MAP['Iptc4xmpExt']}{'PersonInImage'}", xmp_data_type='bag')
+    PersonInImage: tuple = XPath(tag=f"{NS_MAP['Iptc4xmpExt']}{'PersonInImage'}", xmp_data_type='bag')
 
 
 class Photoshop(Xml):
@@ -292,7 +345,7 @@ class Photoshop(Xml):
     DateCreated: datetime = XPath(tag=f"{NS_MAP['photoshop']}{'DateCreated'}", xmp_data_type='text')
     Urgency: int = XPath(tag=f"{NS_MAP['photoshop']}{'Urgency'}", xmp_data_type='text')
     City: str = XPath(tag=f"{NS_MAP['photoshop']}{'City'}", xmp_data_type='text')
-    State: str = XPath(tag=f"{NS_MAP['photoshop']}{'State'}", xmp_data_type='text')
+    State: str = XPath(tag=f"{NS_MAP['photoshop']}{'State'}", xmp_data_type='text', share_value=True)
     TransmissionReference: str = XPath(tag=f"{NS_MAP['photoshop']}{'TransmissionReference'}", xmp_data_type='text')
 
 
@@ -319,11 +372,11 @@ class Dc(Xml):
     """
 
     # DC properties
-    creator: list = XPath(tag=f"{NS_MAP['dc']}{'creator'}", xmp_data_type='bag')
+    creator: tuple = XPath(tag=f"{NS_MAP['dc']}{'creator'}", xmp_data_type='bag')
     description: str = XPath(tag=f"{NS_MAP['dc']}{'description'}", xmp_data_type='alt')
     format: str = XPath(tag=f"{NS_MAP['dc']}{'format'}", xmp_data_type='text')
     rights: str = XPath(tag=f"{NS_MAP['dc']}{'rights'}", xmp_data_type='alt')
-    subject: list = XPath(tag=f"{NS_MAP['dc']}{'subject'}", xmp_data_type='bag')
+    subject: tuple = XPath(tag=f"{NS_MAP['dc']}{'subject'}", xmp_data_type='bag')
     title: str = XPath(tag=f"{NS_MAP['dc']}{'title'}", xmp_data_type='text')
 
 
@@ -342,8 +395,8 @@ class Aux(Xml):
 
     # Aux properties
     SerialNumber: str = XPath(tag=f"{NS_MAP['aux']}{'SerialNumber'}", xmp_data_type='text')
-    LensInfo: str = XPath(tag=f"{NS_MAP['aux']}{'LensInfo'}", xmp_data_type='text')
-    Lens: str = XPath(tag=f"{NS_MAP['aux']}{'Lens'}", xmp_data_type='text')
+    LensInfo: str = XPath(tag=f"{NS_MAP['aux']}{'LensInfo'}", xmp_data_type='text', share_value=True)
+    Lens: str = XPath(tag=f"{NS_MAP['aux']}{'Lens'}", xmp_data_type='text', share_value=True)
     LensSerialNumber: str = XPath(tag=f"{NS_MAP['aux']}{'LensSerialNumber'}", xmp_data_type='text')
     FlashCompensation: str = XPath(tag=f"{NS_MAP['aux']}{'FlashCompensation'}", xmp_data_type='text')
     FujiRatingAlreadyApplied: bool = XPath(tag=f"{NS_MAP['aux']}{'FujiRatingAlreadyApplied'}", xmp_data_type='text')
@@ -368,11 +421,11 @@ class Tiff(Xml):
 
     # Tiff properties
     # Artist: str = XPath(tag=f"{NS_MAP['tiff']}{'Artist'}", xmp_data_type='text')
-    Make: str = XPath(tag=f"{NS_MAP['tiff']}{'Make'}", xmp_data_type='text')
-    Model: str = XPath(tag=f"{NS_MAP['tiff']}{'Model'}", xmp_data_type='text')
+    Make: str = XPath(tag=f"{NS_MAP['tiff']}{'Make'}", xmp_data_type='text', share_value=True)
+    Model: str = XPath(tag=f"{NS_MAP['tiff']}{'Model'}", xmp_data_type='text', share_value=True)
 
 
-@dataclass
+@dataclass(slots=True)
 class Exif:
     """
     Properties in the EXIF namespace.
@@ -415,7 +468,7 @@ class Exif:
     Artist: str = None
 
 
-@dataclass
+@dataclass(slots=True)
 class Schemas:
     """
     XMP namespace definitions
@@ -440,24 +493,137 @@ class Schemas:
 
     """
     xml_tree: InitVar[etree._ElementTree]
-    xmp: Xmp = field(default=Xmp)
-    xmpRights: XmpRights = field(default=XmpRights)
-    xmpMM: XmpMM = field(default=XmpMM)
-    Iptc4xmpCore: Iptc4XmpCore = field(default=Iptc4XmpCore)
-    Iptc4xmpExt: Iptc4XmpExt = field(default=Iptc4XmpExt)
-    photoshop: Photoshop = field(default=Photoshop)
-    dc: Dc = field(default=Dc)
-    aux: Aux = field(default=Aux)
-    tiff: Tiff = field(default=Tiff)
+    xmp: Xmp = field(init=False)
+    xmpRights: XmpRights = field(init=False)
+    xmpMM: XmpMM = field(init=False)
+    Iptc4xmpCore: Iptc4XmpCore = field(init=False)
+    Iptc4xmpExt: Iptc4XmpExt = field(init=False)
+    photoshop: Photoshop = field(init=False)
+    dc: Dc = field(init=False)
+    aux: Aux = field(init=False)
+    tiff: Tiff = field(init=False)
     exif: Exif = field(default_factory=Exif)
+    _index: dict = field(default_factory=dict, init=False, repr=False, compare=False)  # (prefix, localname) -> value
+    _xml_tree: etree._ElementTree = field(default=None, init=False, repr=False, compare=False)
+    _elements: dict = field(default=None, init=False, repr=False, compare=False)  # See index_elements()
 
     def __post_init__(self, xml_tree: etree._ElementTree):
-        self.xmp = Xmp(_xml_tree=xml_tree)
-        self.xmpRights = XmpRights(_xml_tree=xml_tree)
-        self.xmpMM = XmpMM(_xml_tree=xml_tree)
-        self.Iptc4xmpCore = Iptc4XmpCore(_xml_tree=xml_tree)
-        self.Iptc4xmpExt = Iptc4XmpExt(_xml_tree=xml_tree)
-        self.photoshop = Photoshop(_xml_tree=xml_tree)
-        self.dc = Dc(_xml_tree=xml_tree)
-        self.aux = Aux(_xml_tree=xml_tree)
-        self.tiff = Tiff(_xml_tree=xml_tree)
+        # Validate the tree once, it is shared with every namespace without re-checking
+        if not isinstance(xml_tree, etree._ElementTree):
+            raise TypeError(f'xml_tree expected type ElementTree, got {type(xml_tree)} instead.')
+        self._xml_tree = xml_tree  # Namespaces are constructed on first access, see __getattr__
+
+    def __getattr__(self, name: str) -> Any:
+        """
+        Constructs a namespace on first access, Python only calls this while its slot is unset.
+
+        The tree is walked once, when the first namespace is constructed, and the element index is shared by all of them.
+
+        :param name: The attribute name
+        :return: The attribute value
+        """
+
+        if (schema := NAMESPACES.get(name)) is None:
+            raise AttributeError(f"'{type(self).__name__}' object has no attribute '{name}'")
+
+        if self._elements is None:
+            self._elements = index_elements(self._xml_tree)
+        value = schema.construct(self._xml_tree, self._elements)
+        setattr(self, name, value)
+
+        return value
+
+    @classmethod
+    def empty(cls) -> 'Schemas':
+        """
+        Returns Schemas without any XMP properties, for images without a (valid) XMP packet.
+
+        A new instance is returned each time since Exif data is assigned to it afterwards,
+        but all of them share one empty XML tree. No XMP property can be present, so the lookup
+        index is pre-filled with None for all of them and lookups never reach the descriptors.
+
+        :return: Schemas with every XMP property set to None
+        """
+
+        schemas = cls(xml_tree=_EMPTY_TREE)
+        schemas._index.update(dict.fromkeys(XMP_KEYS))
+
+        return schemas
+
+    def to_flat_dict(self) -> dict[tuple[str, str], Any]:
+        """
+        Returns every property in a single flat {(prefix, localname): value} dict.
+
+        The values also fill the lookup index, so later calls to lookup() do not touch the XML tree.
+
+        :return: Dictionary of property values by (prefix, localname)
+        """
+
+        properties = {}
+        for key in PROPERTY_KEYS:
+            if (value := self._index.get(key, _MISSING)) is _MISSING:
+                prefix, localname = key
+                value = self._index[key] = getattr(getattr(self, prefix), localname)
+            properties[key] = value
+
+        return properties
+
+    def to_dict(self) -> dict[str, dict[str, Any]]:
+        """
+        Returns every property as a plain {prefix: {localname: value}} dict, grouped from to_flat_dict().
+
+        The result holds no reference to the XML tree, so it can be pickled, e.g. across processes.
+
+        :return: Dictionary of property values by namespace prefix
+        """
+
+        properties = {}
+        for (prefix, localname), value in self.to_flat_dict().items():
+            properties.setdefault(prefix, {})[localname] = value
+
+        return properties
+
+    def to_json(self) -> bytes:
+        """
+        Returns every property as compact UTF-8 JSON, grouped as in to_dict().
+
+        Uses orjson when it is installed and falls back to the standard library otherwise.
+        Dates are written in ISO 8601 format by both, other values that JSON does not support as strings.
+
+        :return: JSON document as bytes
+        """
+
+        properties = self.to_dict()
+        if orjson is not None:
+            return orjson.dumps(properties, default=str)
+
+        return json.dumps(properties, separators=(',', ':'), ensure_ascii=False,
+                          default=lambda o: o.isoformat() if isinstance(o, datetime) else str(o)).encode()
+
+    def lookup(self, prefix: str, localname: str) -> Any:
+        """
+        Looks up a property value by namespace prefix and local name, e.g. ('dc', 'subject').
+
+        Results are kept in a flat (prefix, localname) index, so repeated lookups are a single dict access.
+
+        :param prefix: The namespace prefix, as named in the attributes above
+        :param localname: The property name
+        :return: The property value, or None if not found
+        """
+
+        key = (prefix, localname)
+        if (value := self._index.get(key, _MISSING)) is _MISSING:
+            value = self._index[key] = getattr(getattr(self, prefix, None), localname, None)
+
+        return value
+
+
+# Namespace classes by prefix, see Schemas.__getattr__
+NAMESPACES = {f.name: f.type for f in fields(Schemas) if isinstance(f.type, type) and issubclass(f.type, Xml)}
+
+# (prefix, localname) of every XMP property, see Schemas.empty()
+XMP_KEYS = tuple((prefix, localname) for prefix, schema in NAMESPACES.items()
+                 for localname in schema.__annotations__ if not localname.startswith('_'))
+
+# (prefix, localname) of every XMP and Exif property, in the order of Schemas.to_flat_dict()
+PROPERTY_KEYS = XMP_KEYS + tuple(('exif', f.name) for f in fields(Exif))